@@ -1,12 +1,19 @@
 import datetime as dt
 import logging
-from dataclasses import asdict, dataclass, field
-
-import yaml
-from dash.development.build_process import logger
-from numpy import isin
-
-from budget.clean import RULESET_PATH, Ruleset, build_shorthand_and_list, load_ruleset
+import math
+import os
+from dataclasses import dataclass, field
+
+from budget.clean import (
+    RULESET_PATH,
+    Ruleset,
+    backup_timestamp,
+    build_shorthand_and_list,
+    load_ruleset,
+    write_atomic,
+    yaml_dump,
+    yaml_load,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +22,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 BUDGET_PATH = "src/budget/budgets/"
+AUTOSAVE_INTERVAL = dt.timedelta(seconds=2)
 
 
 @dataclass
@@ -26,6 +34,23 @@ class Budget:
     total_budgeted: float = 0
     items: list["BudgetItem"] = field(default_factory=list)
 
+    def to_dict(self) -> dict:
+        # Equivalent to asdict for this fixed shape, without its recursive copy
+        return {
+            "name": self.name,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "last_edited": self.last_edited,
+            "total_budgeted": self.total_budgeted,
+            "items": [
+                {
+                    "categories": list(item.categories),
+                    "budgeted_amount": item.budgeted_amount,
+                }
+                for item in self.items
+            ],
+        }
+
 
 @dataclass
 class BudgetItem:
@@ -36,21 +61,22 @@ class BudgetItem:
 def write_budget(budget: Budget, filename: str = None):
     if filename is None:
         filename = budget.name
-    with open(f"{BUDGET_PATH}{filename}.yaml", "w") as f:
-        yaml.dump(asdict(budget), f)
+    write_atomic(f"{BUDGET_PATH}{filename}.yaml", yaml_dump(budget.to_dict()))
 
 
 def save_budget(budget: Budget):
-    write_budget(budget)
-    write_budget(
-        budget,
-        filename=f'backup_{budget.name}_{dt.datetime.now().strftime("%Y%m%d_%H%M%S")}',
-    )
+    # Serialize once and write the same document to both files
+    text = yaml_dump(budget.to_dict())
+    for filename in [
+        budget.name,
+        f"backup_{budget.name}_{backup_timestamp()}",
+    ]:
+        write_atomic(f"{BUDGET_PATH}{filename}.yaml", text)
 
 
 def read_budget(budget_name: str):
     with open(f"{BUDGET_PATH}{budget_name}.yaml", "r") as f:
-        budget = Budget(**yaml.safe_load(f))
+        budget = Budget(**yaml_load(f))
         budget_items = []
         for item in budget.items:
             budget_items.append(BudgetItem(**item))
@@ -60,23 +86,26 @@ def read_budget(budget_name: str):
 
 
 def list_budgets() -> list[str]:
-    import os
-
-    files = os.listdir(BUDGET_PATH)
-    budgets = [
-        f[:-5] for f in files if f.endswith(".yaml") and not f.startswith("backup")
-    ]
+    with os.scandir(BUDGET_PATH) as entries:
+        budgets = [
+            entry.name[:-5]
+            for entry in entries
+            if entry.name.endswith(".yaml")
+            and not entry.name.startswith(("backup", "autosave"))
+            and entry.is_file()
+        ]
     return budgets
 
 
 def get_budget_item(ruleset: Ruleset) -> BudgetItem:
     shorthands = build_shorthand_and_list(ruleset)
     categories = input("Enter category or categories (comma separated shorthands): ")
-    resolved_categories = [
-        str(shorthands.get(cat.strip().lower(), "")) for cat in categories.split(",")
-    ]
-    if "" in resolved_categories:
-        raise ValueError(f"Invalid category shorthand, {categories}.")
+    try:
+        resolved_categories = [
+            shorthands[cat.strip().lower()] for cat in categories.split(",")
+        ]
+    except KeyError:
+        raise ValueError(f"Invalid category shorthand, {categories}.") from None
 
     amount = float(input("Enter budgeted amount: "))
     item = BudgetItem(categories=resolved_categories, budgeted_amount=amount)
@@ -117,11 +146,10 @@ def print_budget_items(budget: Budget):
         return
 
     logger.info("Current items:")
-    budget_left = budget.total_budgeted - sum(
-        item.budgeted_amount for item in budget.items
-    )
+    total_budgeted = math.fsum(item.budgeted_amount for item in budget.items)
+    budget_left = budget.total_budgeted - total_budgeted
     logger.info(
-        f"Total budget: {budget.total_budgeted}, Total budgeted: {sum(item.budgeted_amount for item in budget.items)}, Budget left: {budget_left}"
+        f"Total budget: {budget.total_budgeted}, Total budgeted: {total_budgeted}, Budget left: {budget_left}"
     )
     for idx, item in enumerate(budget.items):
         logger.info(
@@ -133,6 +161,10 @@ def edit_budget(budget: Budget, ruleset: Ruleset) -> Budget:
     logger.info(f"Editing budget: {budget.name}")
     print_budget_items(budget)
 
+    # Only autosave after a mutation, and at most once per AUTOSAVE_INTERVAL
+    dirty = False
+    last_autosave = dt.datetime.min
+
     while True:
         action = (
             input(
@@ -144,11 +176,13 @@ def edit_budget(budget: Budget, ruleset: Ruleset) -> Budget:
         if action == "a":
             new_item = get_budget_item(ruleset)
             budget.items.append(new_item)
+            dirty = True
         elif action == "e":
             item_idx = int(input("Enter the item number to edit: ")) - 1
             if 0 <= item_idx < len(budget.items):
                 logger.info(f"Editing item {item_idx + 1}")
                 budget.items[item_idx] = get_budget_item(ruleset)
+                dirty = True
             else:
                 logger.info("Invalid item number.")
         elif action == "r":
@@ -156,18 +190,24 @@ def edit_budget(budget: Budget, ruleset: Ruleset) -> Budget:
             if 0 <= item_idx < len(budget.items):
                 del budget.items[item_idx]
                 logger.info("Item removed.")
+                dirty = True
             else:
                 logger.info("Invalid item number.")
         elif action == "m":
             budget = edit_budget_metadata(budget)
-
+            dirty = True
         elif action == "done":
             break
         else:
             logger.info("Invalid action. Please enter 'a', 'e', 'r', or 'done'.")
-        budget.last_edited = dt.datetime.now()
         print_budget_items(budget)
-        write_budget(budget, filename=f"autosave_{budget.name}")
+        if dirty:
+            now = dt.datetime.now()
+            budget.last_edited = now
+            if now - last_autosave > AUTOSAVE_INTERVAL:
+                write_budget(budget, filename=f"autosave_{budget.name}")
+                last_autosave = now
+                dirty = False
 
     return budget
 
@@ -1,11 +1,22 @@
 import datetime as dt
+import functools
 import logging
+import os
+import re
+import sys
 from dataclasses import asdict, dataclass
 
-import numpy as np
-import pandas as pd
 import yaml
 
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+_LOADER = SafeLoader
+_DUMPER = SafeDumper
+
 RULESET_PATH = "src/budget/rulesets/"
 DATA_PATH = "src/budget/data/"
 
@@ -16,6 +27,52 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def yaml_load(f):
+    return yaml.load(f, Loader=_LOADER)
+
+
+def yaml_dump(obj, f=None):
+    # Returns the document as a string when no stream is given
+    return yaml.dump(
+        obj,
+        f,
+        Dumper=_DUMPER,
+        sort_keys=False,
+        default_flow_style=None,
+        allow_unicode=True,
+        width=10**9,
+    )
+
+
+def write_atomic(path, text):
+    # Write to a temporary file and swap it in, so an interrupted write never
+    # leaves a truncated file behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def backup_timestamp():
+    # Same output as strftime("%Y%m%d_%H%M%S") without the locale-aware path
+    n = dt.datetime.now()
+    return (
+        f"{n.year:04d}{n.month:02d}{n.day:02d}_"
+        f"{n.hour:02d}{n.minute:02d}{n.second:02d}"
+    )
+
+
+@functools.cache
+def _pyarrow():
+    # Optional and slow to import, so only looked up once it is needed
+    try:
+        import pyarrow as pa
+        import pyarrow.compute  # noqa: F401
+    except ImportError:
+        return None
+    return pa
+
+
 @dataclass
 class Rule:
     string_to_match: str
@@ -29,9 +86,12 @@ class Ruleset:
 
 
 def read_data():
-    debit = pd.read_csv(f"{DATA_PATH}checking.csv")
-    credit = pd.read_csv(f"{DATA_PATH}visa.csv")
-    savings = pd.read_csv(f"{DATA_PATH}savings.csv")
+    import pandas as pd
+
+    engine = "pyarrow" if _pyarrow() else "c"
+    debit = pd.read_csv(f"{DATA_PATH}checking.csv", engine=engine)
+    credit = pd.read_csv(f"{DATA_PATH}visa.csv", engine=engine)
+    savings = pd.read_csv(f"{DATA_PATH}savings.csv", engine=engine)
     # drop last column
     credit = credit.iloc[:, :-1]
     debit["type"] = "debit"
@@ -46,39 +106,96 @@ def read_data():
     return df
 
 
+def match_rules(descriptions, ruleset):
+    """Return a boolean matrix of shape (len(descriptions), len(ruleset.rules))
+    that is True where the rule's string_to_match occurs in the description.
+
+    With pyarrow, each pattern is a vectorized substring scan over the column.
+    Otherwise all patterns are scanned in a single pass per description. The
+    lookahead reports the longest pattern starting at each position; any
+    shorter pattern starting there is a substring of it, so it is added from
+    `contained`.
+    """
+    import numpy as np
+
+    matches = np.zeros((len(descriptions), len(ruleset.rules)), dtype=bool)
+    if not ruleset.rules:
+        return matches
+
+    pa = _pyarrow()
+    if pa is not None:
+        column = pa.array(descriptions, type=pa.string(), from_pandas=True)
+        for idx, rule in enumerate(ruleset.rules):
+            matches[:, idx] = (
+                pa.compute.match_substring(column, rule.string_to_match)
+                .fill_null(False)
+                .to_numpy(zero_copy_only=False)
+            )
+        return matches
+
+    scanner, contained = _build_matcher(
+        tuple(rule.string_to_match for rule in ruleset.rules)
+    )
+
+    for row, description in enumerate(descriptions):
+        if not isinstance(description, str):
+            continue
+        found = {m.group(1) for m in scanner.finditer(description)}
+        for p in found:
+            matches[row, contained[p]] = True
+
+    return matches
+
+
+@functools.lru_cache(maxsize=8)
+def _build_matcher(patterns):
+    indices = {}
+    for idx, p in enumerate(patterns):
+        indices.setdefault(p, []).append(idx)
+
+    ordered = sorted(indices, key=len, reverse=True)
+    scanner = re.compile(f"(?=({'|'.join(re.escape(p) for p in ordered)}))")
+    contained = {
+        p: [idx for q in ordered if q in p for idx in indices[q]] for p in ordered
+    }
+    return scanner, contained
+
+
 def apply_rules(df, ruleset):
+    import numpy as np
 
-    df["category"] = ""
+    matches = match_rules(df["description"], ruleset)
 
     # Apply row removals
-    for rule in ruleset.rules:
-        if not rule.keep:
-            df = df[~df["description"].str.contains(rule.string_to_match, regex=False)]
+    removed = [idx for idx, rule in enumerate(ruleset.rules) if not rule.keep]
+    keep = ~matches[:, removed].any(axis=1)
+    df = df[keep].copy()
+    matches = matches[keep]
+
+    # Collect categories per row, joined once at the end
+    categories = [[] for _ in range(len(df))]
+    for idx, rule in enumerate(ruleset.rules):
         if rule.category:
-            # Extend categories string to the assigned category
-
-            matches = df["description"].str.contains(rule.string_to_match, regex=False)
-            if matches.sum() > 0:
+            rows = np.flatnonzero(matches[:, idx])
+            if len(rows) > 0:
                 logger.info(
-                    f"{matches.sum()} matches for {rule.string_to_match} -> {rule.category}"
-                )
-
-                df.loc[matches, "category"] = (
-                    rule.category + ", " + df.loc[matches, "category"]
+                    f"{len(rows)} matches for {rule.string_to_match} -> {rule.category}"
                 )
+                for row in rows:
+                    categories[row].append(rule.category)
 
-    df["category"] = df["category"].str.strip(", ")
+    # Later rules come first, as when categories were prepended
+    df["category"] = [", ".join(reversed(cats)) for cats in categories]
     return df
 
 
 def build_shorthand_category_mapping(ruleset):
-    categories = set()
-    for rule in ruleset.rules:
-        if rule.category:
-            categories.add(rule.category)
+    categories = {rule.category for rule in ruleset.rules if rule.category}
+    return dict(_build_shorthands(tuple(sorted(categories))))
 
-    categories = sorted(list(categories))
 
+@functools.lru_cache(maxsize=8)
+def _build_shorthands(categories):
     shorthands = {}
     for cat in categories:
         length = 1
@@ -115,16 +232,19 @@ def build_shorthand_and_list(ruleset):
 
 
 def categorize(df, ruleset):
+    import pandas as pd
 
     df = apply_rules(df, ruleset)
 
-    nulls = df["category"].isnull() + (df["category"] == "")
+    # Rules are append-only, so categorized rows never become uncategorized
+    uncategorized = (df["category"].isnull() | (df["category"] == "")).to_numpy()
+    multiple_categories = df["category"].str.contains(",", regex=False, na=False).any()
 
-    while nulls.sum() > 0:
-        logger.info(f"{nulls.sum()} uncategorized transactions remaining")
+    while uncategorized.any():
+        logger.info(f"{uncategorized.sum()} uncategorized transactions remaining")
 
         # Gather latest uncategorized transaction
-        first_null = df[nulls].iloc[0]
+        first_null = df.iloc[uncategorized.argmax()]
         description = first_null["description"]
         date = first_null["date"]
         amount = (
@@ -145,7 +265,7 @@ def categorize(df, ruleset):
         if user_cat.lower() in shorthands:
             cat = shorthands[user_cat.lower()]
         else:
-            cat = user_cat
+            cat = sys.intern(user_cat)
 
         # Generate general rule if wanted
         make_rule = input("Make a general rule? (default no) (y/n): ")
@@ -155,43 +275,55 @@ def categorize(df, ruleset):
                 f'Creating rule: If description contains "{description}", categorize as "{cat}"'
             )
 
-        # Add rule and re-apply ruleset
-        ruleset.rules.append(Rule(string_to_match=description, keep=True, category=cat))
-        df = apply_rules(df, ruleset)
-
-        # Check for multiple categories in any transaction i.e. overlapping rules
-        multiple_categories = any(["," in c for c in df["category"].unique()])
-        if multiple_categories:
-            logger.error(
-                "Some transactions have multiple categories assigned. This may lead to unexpected behavior."
+        # Add rule and apply only the new rule, as apply_rules would; like
+        # apply_rules, a rule with an empty category assigns nothing
+        rule = Rule(string_to_match=description, keep=True, category=cat)
+        ruleset.rules.append(rule)
+        if cat:
+            matches = match_rules(df["description"], Ruleset(rules=[rule]))[:, 0]
+            logger.info(f"{matches.sum()} matches for {rule.string_to_match} -> {cat}")
+
+            overlapping = matches & ~uncategorized
+            df.loc[matches & uncategorized, "category"] = cat
+            df.loc[overlapping, "category"] = (
+                cat + ", " + df.loc[overlapping, "category"].to_numpy()
             )
-            break
 
-        # Re count uncategorized transactions
-        nulls = df["category"].isnull() + (df["category"] == "")
+            # Check for multiple categories in any transaction i.e. overlapping rules
+            multiple_categories |= overlapping.any()
+            if multiple_categories:
+                logger.error(
+                    "Some transactions have multiple categories assigned. This may lead to unexpected behavior."
+                )
+                break
+
+            # Re count uncategorized transactions
+            uncategorized &= ~matches
 
         # Autosave ruleset
-        with open(f"{RULESET_PATH}rules_autosave.yaml", "w") as f:
-            yaml.dump(asdict(ruleset), f)
+        write_atomic(f"{RULESET_PATH}rules_autosave.yaml", yaml_dump(asdict(ruleset)))
 
     return df, ruleset
 
 
 def save_ruleset_with_backup(ruleset):
-    with open(f"{RULESET_PATH}rules.yaml", "w") as f:
-        yaml.dump(asdict(ruleset), f)
-
-    with open(
-        f'{RULESET_PATH}rules_{dt.datetime.now().strftime("%Y%m%d_%H%M%S")}.yaml', "w"
-    ) as f:
-        yaml.dump(asdict(ruleset), f)
+    text = yaml_dump(asdict(ruleset))
+    for filename in [
+        "rules",
+        f"rules_{backup_timestamp()}",
+    ]:
+        write_atomic(f"{RULESET_PATH}{filename}.yaml", text)
 
 
 def load_ruleset():
     try:
         with open(f"{RULESET_PATH}rules.yaml", "r") as f:
-            rules_dict = yaml.safe_load(f)
+            rules_dict = yaml_load(f)
             ruleset = Ruleset(rules=[Rule(**rule) for rule in rules_dict["rules"]])
+        # Share one string object per category across rules and rows
+        for rule in ruleset.rules:
+            if rule.category:
+                rule.category = sys.intern(rule.category)
     except FileNotFoundError:
         ruleset = Ruleset(rules=[])
     return ruleset
@@ -211,6 +343,10 @@ if __name__ == "__main__":
 
     # Save filtered transactions
     df.to_csv(f"{DATA_PATH}transactions.csv", index=False)
+    if _pyarrow() is not None:
+        from budget.data_io import to_parquet
+
+        to_parquet(df)
 
     save_ruleset_with_backup(ruleset)
     logger.info(
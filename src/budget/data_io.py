@@ -0,0 +1,83 @@
+import logging
+import os
+
+import pandas as pd
+
+from budget.clean import DATA_PATH
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(filename)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+TRANSACTIONS_CSV = f"{DATA_PATH}transactions.csv"
+TRANSACTIONS_PARQUET = f"{DATA_PATH}transactions.parquet"
+TRANSACTION_COLUMNS = ["date", "description", "category", "in", "out"]
+# Repeated text is stored as category codes; money stays float64 so sums and
+# table values keep their cents exact
+TRANSACTION_DTYPES = {
+    "description": "category",
+    "category": "category",
+    "in": "float64",
+    "out": "float64",
+}
+
+
+def to_parquet(df=None):
+    """Write transactions to Parquet with a typed schema.
+
+    Reads transactions.csv when no dataframe is given.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if df is None:
+        df = pd.read_csv(
+            TRANSACTIONS_CSV, usecols=TRANSACTION_COLUMNS, dtype=TRANSACTION_DTYPES
+        )
+    # Uncategorized rows hold "" in memory but read back from CSV as missing;
+    # store them as missing so both files load the same frame
+    df = df[TRANSACTION_COLUMNS].assign(
+        date=pd.to_datetime(df["date"]),
+        category=df["category"].where(df["category"] != ""),
+    )
+
+    schema = pa.schema(
+        [
+            ("date", pa.timestamp("ns")),
+            ("description", pa.dictionary(pa.int32(), pa.string())),
+            ("category", pa.dictionary(pa.int32(), pa.string())),
+            ("in", pa.float64()),
+            ("out", pa.float64()),
+        ]
+    )
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    pq.write_table(table, TRANSACTIONS_PARQUET, compression="snappy")
+    logger.info(f"Saved {len(df)} transactions to {TRANSACTIONS_PARQUET}")
+
+
+def read_transactions():
+    # Only trust the Parquet copy if it is at least as new as the CSV
+    if os.path.exists(TRANSACTIONS_PARQUET) and (
+        not os.path.exists(TRANSACTIONS_CSV)
+        or os.path.getmtime(TRANSACTIONS_PARQUET) >= os.path.getmtime(TRANSACTIONS_CSV)
+    ):
+        df = pd.read_parquet(
+            TRANSACTIONS_PARQUET, engine="pyarrow", columns=TRANSACTION_COLUMNS
+        )
+        # No-op unless the file predates the dictionary-encoded schema
+        return df.astype(TRANSACTION_DTYPES)
+
+    df = pd.read_csv(
+        TRANSACTIONS_CSV,
+        usecols=TRANSACTION_COLUMNS,
+        dtype=TRANSACTION_DTYPES,
+        parse_dates=["date"],
+    )
+    # usecols keeps the file's column order; match the Parquet schema
+    return df[TRANSACTION_COLUMNS]
+
+
+if __name__ == "__main__":
+    to_parquet()
@@ -1,51 +1,140 @@
-import itertools
+import functools
 import logging
+import math
+import operator
 
 import dash
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from dash import dash_table, dcc, html
 from dash.dependencies import Input, Output
 
 from budget.budget_manager import read_budget
+from budget.data_io import read_transactions
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(filename)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
-# Read the transactions CSV
-transactions_df = pd.read_csv("src/budget/data/transactions.csv")
-transactions_df["date"] = pd.to_datetime(transactions_df["date"])
+
+TABLE_PAGE_SIZE = 25
+TABLE_COLUMNS = {
+    "date": "Date",
+    "description": "Description",
+    "category": "Category",
+    "money_in": "Money In",
+    "money_out": "Money Out",
+}
+
+# Dash encodes callback responses through plotly.io, so this makes both figure
+# and response serialization use orjson when it is installed
+try:
+    import orjson  # noqa: F401
+
+    pio.json.config.default_engine = "orjson"
+except ImportError:
+    logger.info("orjson not installed, falling back to json for serialization")
+
+# Read the transactions (Parquet when available, otherwise CSV)
+transactions_df = read_transactions()
 
 # Make sure 'in' and 'out' columns exist
 # Rename for clarity
 transactions_df = transactions_df.rename(columns={"in": "money_in", "out": "money_out"})
 
-# Add month column
-transactions_df["month"] = transactions_df["date"].dt.to_period("M").astype(str)
+# Add month column, as an ordered categorical so months compare chronologically
+months = transactions_df["date"].dt.to_period("M")
+month_categories = pd.PeriodIndex(sorted(months.unique()), freq="M").astype(str)
+transactions_df["month"] = pd.Categorical(
+    months.astype(str), categories=month_categories, ordered=True
+)
 
-# Aggregate monthly sums
+# Aggregate monthly sums by resampling on the dates (kept sorted: the dropdown
+# and line plot rely on chronological order). Reindexing drops the empty months
+# resample fills in, leaving one row per month category.
 monthly_summary = (
-    transactions_df.groupby("month")
+    transactions_df.set_index("date")
+    .resample("MS")
     .agg(
-        total_in=pd.NamedAgg(column="money_in", aggfunc="sum"),
-        total_out=pd.NamedAgg(column="money_out", aggfunc="sum"),
+        total_in=("money_in", "sum"),
+        total_out=("money_out", "sum"),
     )
+    .reindex(pd.PeriodIndex(month_categories, freq="M").to_timestamp())
+    .rename_axis("month_ts")
     .reset_index()
 )
+monthly_summary.insert(
+    0,
+    "month",
+    pd.Categorical(
+        monthly_summary["month_ts"].dt.strftime("%Y-%m"),
+        categories=month_categories,
+        ordered=True,
+    ),
+)
 
 # Aggregate by category and month for line plot
 category_monthly = (
-    transactions_df.groupby(["month", "category"])
+    transactions_df.groupby(["month", "category"], sort=False, observed=True)
     .agg(
-        total_in=pd.NamedAgg(column="money_in", aggfunc="sum"),
-        total_out=pd.NamedAgg(column="money_out", aggfunc="sum"),
+        total_in=("money_in", "sum"),
+        total_out=("money_out", "sum"),
     )
     .reset_index()
 )
 
+# Daily net and cumulative totals for the cumulative line plot, indexed by
+# date (sorted) so the callback can slice a date range by binary search
+daily_transactions = transactions_df.groupby("date").agg(
+    total_in=("money_in", "sum"),
+    total_out=("money_out", "sum"),
+)
+daily_transactions["net"] = (
+    daily_transactions["total_in"] - daily_transactions["total_out"]
+)
+daily_transactions["cumulative"] = daily_transactions["net"].cumsum()
+daily_transactions["cumulative_rolling_avg"] = (
+    daily_transactions["cumulative"].rolling(window=20, center=True).mean()
+)
+
+# Fixed color per category, so a category keeps its color whatever is selected
+color_palette = px.colors.qualitative.Plotly
+category_colors = {
+    cat: color_palette[i % len(color_palette)]
+    for i, cat in enumerate(sorted(transactions_df["category"].dropna().unique()))
+}
+
+# Budget to compare against, read once per process
+budget = read_budget("Student")
+
+# Per-month slices, looked up by the callback instead of filtered each time
+transactions_by_month = {
+    month: group
+    for month, group in transactions_df.groupby("month", sort=False, observed=True)
+}
+category_monthly_by_month = {
+    month: group
+    for month, group in category_monthly.groupby("month", sort=False, observed=True)
+}
+monthly_by_month = dict(
+    zip(
+        monthly_summary["month"],
+        zip(monthly_summary["total_in"], monthly_summary["total_out"]),
+    )
+)
+
+
+def in_month_range(month_column, start_month, end_month):
+    # Compare category codes; the bounds need not be months present in the data
+    bounds = month_categories.slice_indexer(start_month, end_month)
+    codes = month_column.cat.codes
+    return (codes >= bounds.start) & (codes < bounds.stop)
+
+
 # --- Dash App ---
 app = dash.Dash(__name__)
 
@@ -90,7 +179,31 @@ app.layout = html.Div(
         dcc.Graph(id="monthly-line-chart"),
         dcc.Graph(id="cumulative-line-chart"),
         html.H2("Monthly Summary Table"),
-        html.Div(id="monthly-summary-table"),
+        dash_table.DataTable(
+            id="tx-table",
+            columns=[
+                {"name": name, "id": column_id}
+                for column_id, name in TABLE_COLUMNS.items()
+            ],
+            style_table={"overflowX": "auto"},
+            style_cell={"textAlign": "left", "minWidth": 80, "maxWidth": 220},
+            # Render only the rows in view. Virtualization assumes fixed column
+            # widths, which the style_cell min/max widths set. With one
+            # TABLE_PAGE_SIZE page per request it only matters if the page
+            # size grows.
+            virtualization=True,
+            fixed_rows={"headers": True},
+            # Paging, sorting and filtering run in update_table so only the
+            # visible page is sent to the browser
+            page_action="custom",
+            page_current=0,
+            page_size=TABLE_PAGE_SIZE,
+            sort_action="custom",
+            sort_mode="single",
+            sort_by=[],
+            filter_action="custom",
+            filter_query="",
+        ),
     ]
 )
 
@@ -98,7 +211,6 @@ app.layout = html.Div(
 @app.callback(
     Output("monthly-bar-chart", "figure"),
     Output("monthly-line-chart", "figure"),
-    Output("monthly-summary-table", "children"),
     Output("monthly-category-chart", "figure"),
     Output("monthly-budget-chart", "figure"),
     Output("cumulative-line-chart", "figure"),
@@ -107,51 +219,68 @@ app.layout = html.Div(
     Input("category-dropdown", "value"),
 )
 def update_chart(selected_month, num_months, selected_category):
+    # Normalize the category selection into a hashable cache key; a cleared
+    # multi-select sends [] and means the same as no selection
+    if isinstance(selected_category, str):
+        selected_category = [selected_category]
+    selected_category = tuple(sorted(selected_category)) if selected_category else None
+    return build_charts(selected_month, num_months, selected_category)
+
+
+@functools.lru_cache(maxsize=128)
+def build_charts(selected_month, num_months, selected_category):
     # Filter for selected month
-    filtered_overall = monthly_summary[monthly_summary["month"] == selected_month]
-    filtered_with_category = category_monthly[
-        category_monthly["month"] == selected_month
-    ]
+    total_in, total_out = monthly_by_month[selected_month]
+    filtered_with_category = category_monthly_by_month.get(
+        selected_month, category_monthly.iloc[0:0]
+    )
     # Bar chart
 
-    data = pd.DataFrame(
-        {
-            "Type": ["Money In", "Money Out"],
-            "Amount": [
-                filtered_overall["total_in"].values[0],
-                filtered_overall["total_out"].values[0],
-            ],
-        }
+    figure = go.Figure(
+        go.Bar(
+            x=["Money In", "Money Out"],
+            y=[total_in, total_out],
+            marker_color=["green", "red"],
+            texttemplate="$%{y:,.2f}",
+        )
     )
-    figure = px.bar(
-        data,
-        x="Type",
-        y="Amount",
+    figure.update_layout(
         title=f"Money In/Out for {selected_month}",
-        labels={"Type": "Type", "Amount": "Amount"},
-        text=data["Amount"].apply(lambda v: f"${v:,.2f}"),
-        color="Type",
-        color_discrete_map={"Money In": "green", "Money Out": "red"},
+        xaxis_title="Type",
+        yaxis_title="Amount",
     )
-    logger.info(f"Overall Sum: {data['Amount'].sum()}")
+    logger.info(f"Overall Sum: {total_in + total_out}")
 
     filtered_with_category = filtered_with_category.sort_values(
         by="total_out", ascending=False
     )
 
     # Category bar chart
-    category_figure = px.bar(
-        filtered_with_category,
-        x="category",
-        y=["total_in", "total_out"],
+    categories_x = filtered_with_category["category"].astype(str).to_numpy()
+    category_figure = go.Figure(
+        [
+            go.Bar(
+                x=categories_x,
+                y=filtered_with_category["total_in"].to_numpy(),
+                name="total_in",
+                marker_color="green",
+            ),
+            go.Bar(
+                x=categories_x,
+                y=filtered_with_category["total_out"].to_numpy(),
+                name="total_out",
+                marker_color="red",
+            ),
+        ]
+    )
+    category_figure.update_layout(
         barmode="group",
         title=f"Money In/Out by Category for {selected_month}",
-        labels={"value": "Amount", "category": "Category"},
-        color_discrete_map={"total_in": "green", "total_out": "red"},
+        xaxis_title="Category",
+        yaxis_title="Amount",
     )
 
     ### Budget vs Actuals ###
-    budget = read_budget("Student")
     logger.info(f"Budget: {budget}")
 
     budget_data = pd.DataFrame(columns=["Category", "Type", "Value"])
@@ -207,57 +336,68 @@ def update_chart(selected_month, num_months, selected_category):
         f"Budget Sum: {budget_data[budget_data['Type'] == 'actual']['Value'].sum()}"
     )
 
-    budget_bar_fig = px.bar(
-        budget_data,
-        x="Category",
-        y="Value",
-        color="Type",
+    budget_bar_fig = go.Figure(
+        [
+            go.Bar(
+                x=group["Category"].to_numpy(),
+                y=group["Value"].to_numpy(),
+                name=value_type,
+                texttemplate="$%{y:,.2f}",
+            )
+            for value_type, group in budget_data.groupby("Type", sort=False)
+        ]
+    )
+    budget_bar_fig.update_layout(
         barmode="group",
         title="Budgeted vs Actual by Category",
-        labels={"Value": "Amount ($)", "Category": "Category", "Type": "Type"},
-        text=budget_data["Value"].apply(lambda v: f"${v:,.2f}"),
+        xaxis_title="Category",
+        yaxis_title="Amount ($)",
+        legend_title_text="Type",
     )
 
     start_month = str(pd.Period(selected_month, freq="M") - (num_months - 1))
 
     # line plot for previous 6 months
     if selected_category and "All" not in selected_category:
-        if isinstance(selected_category, str):
-            selected_category = [selected_category]
-
+        # Match on integer category codes rather than hashing strings
+        category_codes = category_monthly["category"].cat
+        selected_codes = category_codes.categories.get_indexer(selected_category)
         filtered_category_monthly = category_monthly[
-            category_monthly["category"].isin(selected_category)
+            np.isin(
+                category_codes.codes.to_numpy(), selected_codes[selected_codes >= 0]
+            )
         ]
         prev_months = filtered_category_monthly[
-            (filtered_category_monthly["month"] >= start_month)
-            & (filtered_category_monthly["month"] <= selected_month)
+            in_month_range(
+                filtered_category_monthly["month"], start_month, selected_month
+            )
         ]
 
-        categories = prev_months["category"].unique()
+        categories = sorted(prev_months["category"].unique())
 
         line_figure = go.Figure()
 
-        color_palette = px.colors.qualitative.Plotly
-        color_cycle = itertools.cycle(color_palette)
-        category_colors = {cat: next(color_cycle) for cat in categories}
+        # One column per (total, category), with 0 for months with no data
+        all_months = pd.period_range(
+            start=start_month, end=selected_month, freq="M"
+        ).astype(str)
+        wide = prev_months.pivot_table(
+            index="month",
+            columns="category",
+            values=["total_in", "total_out"],
+            aggfunc="sum",
+            fill_value=0,
+            observed=True,
+        )
+        wide.index = wide.index.astype(str)
+        wide = wide.reindex(all_months, fill_value=0)
 
         for cat in categories:
-            cat_data = prev_months[prev_months["category"] == cat]
-            # add 0 for months with no data
-            all_months = pd.period_range(
-                start=start_month, end=selected_month, freq="M"
-            ).astype(str)
-            cat_data = (
-                cat_data.set_index("month")
-                .reindex(all_months, fill_value=0)
-                .reset_index()
-                .rename(columns={"index": "month"})
-            )
             # Money In: solid line
             line_figure.add_trace(
                 go.Scatter(
-                    x=cat_data["month"],
-                    y=cat_data["total_in"],
+                    x=all_months,
+                    y=wide["total_in"][cat].to_numpy(),
                     mode="lines",
                     name=f"{cat} In",
                     line=dict(color=category_colors[cat], dash="dash"),
@@ -266,8 +406,8 @@ def update_chart(selected_month, num_months, selected_category):
             # Money Out: dashed line
             line_figure.add_trace(
                 go.Scatter(
-                    x=cat_data["month"],
-                    y=cat_data["total_out"],
+                    x=all_months,
+                    y=wide["total_out"][cat].to_numpy(),
                     mode="lines",
                     name=f"{cat} Out",
                     line=dict(color=category_colors[cat], dash="solid"),
@@ -281,9 +421,9 @@ def update_chart(selected_month, num_months, selected_category):
         )
 
     else:
-        prev_months = monthly_summary[
-            (monthly_summary["month"] >= start_month)
-            & (monthly_summary["month"] <= selected_month)
+        # One row per month category in order, so row positions are the codes
+        prev_months = monthly_summary.iloc[
+            month_categories.slice_indexer(start_month, selected_month)
         ]
         average_in = prev_months["total_in"].mean()
         average_out = prev_months["total_out"].mean()
@@ -311,29 +451,10 @@ def update_chart(selected_month, num_months, selected_category):
             line_color="red",
         )
 
-    daily_transactions = (
-        transactions_df.copy()
-        .groupby("date")
-        .agg(
-            total_in=pd.NamedAgg(column="money_in", aggfunc="sum"),
-            total_out=pd.NamedAgg(column="money_out", aggfunc="sum"),
-        )
-        .reset_index()
-    )
     end_date = pd.Period(selected_month, freq="M").end_time
-    daily_transactions["net"] = (
-        daily_transactions["total_in"] - daily_transactions["total_out"]
-    )
-
-    daily_cumulative = daily_transactions.sort_values(by="date").copy()
-    daily_cumulative["cumulative"] = daily_cumulative["net"].cumsum()
-    daily_cumulative["cumulative_rolling_avg"] = (
-        daily_cumulative["cumulative"].rolling(window=20, center=True).mean()
-    )
-    daily_cumulative = daily_cumulative[
-        (daily_cumulative["date"] >= pd.to_datetime(start_month + "-01"))
-        & (daily_cumulative["date"] <= end_date)
-    ]
+    daily_cumulative = daily_transactions.loc[
+        pd.Timestamp(start_month + "-01") : end_date
+    ].reset_index()
 
     cumulative_line_figure = px.line(
         daily_cumulative,
@@ -347,40 +468,123 @@ def update_chart(selected_month, num_months, selected_category):
         },
     )
 
-    transactions = transactions_df[transactions_df["month"] == selected_month]
-    # Format columns for display
-    transactions_display = transactions.copy()
-    transactions_display["date"] = pd.to_datetime(
-        transactions_display["date"]
-    ).dt.strftime("%Y-%m-%d")
-
-    # Table
-
-    table = dash_table.DataTable(
-        columns=[
-            {"name": "Date", "id": "date"},
-            {"name": "Description", "id": "description"},
-            {"name": "Category", "id": "category"},
-            {"name": "Money In", "id": "money_in"},
-            {"name": "Money Out", "id": "money_out"},
-        ],
-        data=transactions_display.to_dict("records"),
-        style_table={"overflowX": "auto"},
-        style_cell={"textAlign": "left"},
-        sort_action="native",
-        filter_action="native",
-    )
     logger.info("Update complete")
 
     return (
         figure,
         line_figure,
-        table,
         category_figure,
         budget_bar_fig,
         cumulative_line_figure,
     )
 
 
+FILTER_OPERATORS = [
+    ("ge", ">="),
+    ("le", "<="),
+    ("lt", "<"),
+    ("gt", ">"),
+    ("ne", "!="),
+    ("eq", "="),
+    ("contains",),
+    ("datestartswith",),
+]
+COMPARISONS = {
+    "ge": operator.ge,
+    "le": operator.le,
+    "lt": operator.lt,
+    "gt": operator.gt,
+    "ne": operator.ne,
+    "eq": operator.eq,
+}
+
+
+def split_filter_part(filter_part):
+    """Split one DataTable filter expression, e.g. '{money_out} > 100', into
+    (column, operator, value). Returns (None, None, None) if it cannot be parsed.
+    """
+    # The operator directly follows the column, so values may contain operators
+    name_part, _, expression = filter_part.partition("} ")
+    name = name_part[name_part.find("{") + 1 :]
+    for operator_type in FILTER_OPERATORS:
+        for op in operator_type:
+            if not expression.startswith(f"{op} "):
+                continue
+            value_part = expression[len(op) + 1 :].strip()
+            quote = value_part[:1]
+            if quote in ("'", '"', "`") and value_part[-1] == quote:
+                value = value_part[1:-1].replace("\\" + quote, quote)
+            elif operator_type[0] in COMPARISONS:
+                try:
+                    value = float(value_part)
+                except ValueError:
+                    value = value_part
+            else:
+                # Text matches keep the value as typed, e.g. contains 2024
+                value = value_part
+            return name, operator_type[0], value
+    return None, None, None
+
+
+def filter_rows(df, column, op, value):
+    series = df[column]
+    if op in ("contains", "datestartswith"):
+        # Missing cells never match, as with the native filter
+        text = series.astype("string")
+        if op == "contains":
+            return text.str.contains(str(value), regex=False, na=False)
+        return text.str.startswith(str(value), na=False)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    try:
+        return COMPARISONS[op](series, value)
+    except TypeError:
+        # e.g. ordering text against a number
+        return pd.Series(False, index=df.index)
+
+
+def sort_key(series):
+    # Categorical codes follow the Parquet dictionary order; sort by the text
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(object)
+    return series
+
+
+@app.callback(
+    Output("tx-table", "data"),
+    Output("tx-table", "page_count"),
+    Output("tx-table", "page_current"),
+    Input("month-dropdown", "value"),
+    Input("tx-table", "page_current"),
+    Input("tx-table", "page_size"),
+    Input("tx-table", "sort_by"),
+    Input("tx-table", "filter_query"),
+)
+def update_table(selected_month, page_current, page_size, sort_by, filter_query):
+    transactions = transactions_by_month[selected_month][list(TABLE_COLUMNS)]
+    # Format dates once; YYYY-MM-DD strings also sort and filter as expected
+    transactions = transactions.assign(
+        date=transactions["date"].dt.strftime("%Y-%m-%d")
+    )
+
+    for filter_part in (filter_query or "").split(" && "):
+        column, op, value = split_filter_part(filter_part)
+        if column in transactions.columns:
+            transactions = transactions[filter_rows(transactions, column, op, value)]
+
+    if sort_by:
+        transactions = transactions.sort_values(
+            [col["column_id"] for col in sort_by],
+            ascending=[col["direction"] == "asc" for col in sort_by],
+            key=sort_key,
+        )
+
+    page_count = max(1, math.ceil(len(transactions) / page_size))
+    # A new month or filter can leave fewer pages than the one being viewed
+    page_current = min(page_current, page_count - 1)
+    page = transactions.iloc[page_current * page_size : (page_current + 1) * page_size]
+    return page.to_dict("records"), page_count, page_current
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,172 @@
+import random
+
+import pandas as pd
+import pytest
+
+from budget import clean
+from budget.clean import Rule, Ruleset
+
+WORDS = ["AMAZON", "AMAZON PRIME", "PRIME", "UBER", "UBER EATS", "EATS", "ZON", "PAY"]
+
+
+def reference_apply_rules(df, ruleset):
+    # One str.contains pass per rule, as apply_rules did before match_rules
+    df["category"] = ""
+    for rule in ruleset.rules:
+        if not rule.keep:
+            df = df[~df["description"].str.contains(rule.string_to_match, regex=False)]
+        if rule.category:
+            matches = df["description"].str.contains(rule.string_to_match, regex=False)
+            df.loc[matches, "category"] = (
+                rule.category + ", " + df.loc[matches, "category"]
+            )
+    df["category"] = df["category"].str.strip(", ")
+    return df
+
+
+@pytest.fixture(params=["pyarrow", "regex"])
+def matcher(request, monkeypatch):
+    if request.param == "pyarrow":
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(clean, "_pyarrow", lambda: None)
+    return request.param
+
+
+def test_apply_rules_matches_reference_on_overlapping_rules(matcher):
+    rng = random.Random(0)
+    for _ in range(200):
+        descriptions = [
+            " ".join(rng.choices(WORDS + ["X", "Y"], k=rng.randint(1, 4)))
+            for _ in range(40)
+        ]
+        # Duplicate index labels, as after concatenating the account files
+        df = pd.concat(
+            [
+                pd.DataFrame({"description": descriptions[:20]}),
+                pd.DataFrame({"description": descriptions[20:]}),
+            ]
+        )
+        ruleset = Ruleset(
+            rules=[
+                Rule(
+                    string_to_match=word,
+                    keep=rng.random() > 0.2,
+                    category=rng.choice(["Food", "Travel", "Shop", None]),
+                )
+                for word in rng.sample(WORDS, rng.randint(0, 8))
+            ]
+        )
+
+        expected = reference_apply_rules(df.copy(), ruleset)
+        result = clean.apply_rules(df.copy(), ruleset)
+
+        assert list(result["description"]) == list(expected["description"])
+        assert list(result["category"]) == list(expected["category"])
+
+
+def test_match_rules_skips_missing_descriptions(matcher):
+    descriptions = pd.Series(["UBER EATS", None, float("nan"), "PAY"])
+    ruleset = Ruleset(rules=[Rule("EATS"), Rule("UBER EATS"), Rule("PAY")])
+
+    matches = clean.match_rules(descriptions, ruleset)
+
+    assert matches.tolist() == [
+        [True, True, False],
+        [False, False, False],
+        [False, False, False],
+        [False, False, True],
+    ]
+
+
+@pytest.fixture
+def scripted_input(monkeypatch, tmp_path):
+    # categorize autosaves the ruleset after each new rule
+    monkeypatch.setattr(clean, "RULESET_PATH", f"{tmp_path}/")
+
+    def script(answers):
+        answers = iter(answers)
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+        return answers
+
+    return script
+
+
+def test_categorize_empty_category_leaves_rows_uncategorized(matcher, scripted_input):
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2024-06-03", "2024-06-02", "2024-06-01"]),
+            "description": ["A STORE", "A CAFE", "PAYROLL A"],
+            "out": [12.0, 3.5, None],
+            "in": [None, None, 1500.0],
+        }
+    )
+    ruleset = Ruleset(rules=[Rule("PAYROLL", category="Income")])
+    # No category, then a general rule matching every row, then stop
+    answers = scripted_input(["", "y", "A", "EXIT"])
+
+    df, ruleset = clean.categorize(df, ruleset)
+
+    assert list(df["category"]) == ["", "", "Income"]
+    assert [rule.category for rule in ruleset.rules] == ["Income", ""]
+    # The rows were still uncategorized, so the user was asked again
+    assert next(answers, None) is None
+
+
+def test_categorize_reports_overlapping_rules(matcher, scripted_input, caplog):
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2024-06-02", "2024-06-01"]),
+            "description": ["A STORE", "PAYROLL A"],
+            "out": [12.0, None],
+            "in": [None, 1500.0],
+        }
+    )
+    ruleset = Ruleset(rules=[Rule("PAYROLL", category="Income")])
+    # A category whose general rule also matches the payroll row
+    answers = scripted_input(["Shop", "y", "A", "EXIT"])
+
+    df, _ = clean.categorize(df, ruleset)
+
+    assert list(df["category"]) == ["Shop", "Shop, Income"]
+    assert "multiple categories" in caplog.text
+    # The session ends on the overlap, before the next prompt
+    assert next(answers) == "EXIT"
+
+
+def test_categorize_empty_category_is_not_an_overlap(matcher, scripted_input, caplog):
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2024-06-02", "2024-06-01"]),
+            "description": ["A STORE", "PAYROLL A"],
+            "out": [12.0, None],
+            "in": [None, 1500.0],
+        }
+    )
+    ruleset = Ruleset(rules=[Rule("PAYROLL", category="Income")])
+    scripted_input(["", "y", "A", "Shop", "n", "EXIT"])
+
+    df, _ = clean.categorize(df, ruleset)
+
+    assert list(df["category"]) == ["Shop", "Income"]
+    assert "multiple categories" not in caplog.text
+
+
+def test_write_atomic_replaces_file(tmp_path):
+    path = tmp_path / "rules.yaml"
+    path.write_text("old")
+
+    clean.write_atomic(str(path), "new")
+
+    assert path.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["rules.yaml"]
+
+
+def test_save_ruleset_with_backup_round_trips(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean, "RULESET_PATH", f"{tmp_path}/")
+    ruleset = Ruleset(rules=[Rule("PAYROLL", category="Income"), Rule("X", False)])
+
+    clean.save_ruleset_with_backup(ruleset)
+
+    assert clean.load_ruleset() == ruleset
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".yaml", ".yaml"]
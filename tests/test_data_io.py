@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from budget import data_io
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def transactions_paths(tmp_path, monkeypatch):
+    csv_path = tmp_path / "transactions.csv"
+    parquet_path = tmp_path / "transactions.parquet"
+    monkeypatch.setattr(data_io, "TRANSACTIONS_CSV", str(csv_path))
+    monkeypatch.setattr(data_io, "TRANSACTIONS_PARQUET", str(parquet_path))
+    return csv_path, parquet_path
+
+
+def test_parquet_and_csv_load_the_same_frame(transactions_paths):
+    csv_path, parquet_path = transactions_paths
+    # As clean.py leaves it: uncategorized rows have an empty category
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2024-06-03", "2024-06-01", "2024-05-30"]),
+            "description": ["PAYROLL 2024", "TIM HORTONS", "ALPHA STORE"],
+            "out": [None, 2.15, 40.0],
+            "in": [1500.0, None, None],
+            "type": ["debit", "credit", "credit"],
+            "category": ["Income", "Coffee", ""],
+        }
+    )
+    df.to_csv(csv_path, index=False)
+    from_csv = data_io.read_transactions()
+
+    data_io.to_parquet(df)
+    from_parquet = data_io.read_transactions()
+
+    pd.testing.assert_frame_equal(
+        from_parquet.astype({"description": str, "category": object}),
+        from_csv.astype({"description": str, "category": object}),
+        check_dtype=False,
+    )
+    assert from_parquet["category"].isna().tolist() == [False, False, True]
+    assert "" not in from_parquet["category"].cat.categories
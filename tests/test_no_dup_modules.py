@@ -0,0 +1,13 @@
+import re
+from pathlib import Path
+
+import budget
+
+PLOT_PATH = Path(budget.__file__).parent / "plot.py"
+
+
+def test_plot_defines_a_single_app():
+    # A second copy of the module pasted into the file would define its own app
+    source = PLOT_PATH.read_text()
+
+    assert len(re.findall(r"^app = dash\.Dash\(__name__\)", source, re.M)) == 1
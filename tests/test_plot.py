@@ -0,0 +1,211 @@
+import importlib
+import sys
+
+import pandas as pd
+import pytest
+
+# (description, category); categories first appear out of alphabetical order
+DESCRIPTIONS = [
+    ("SOBEYS 123", "Groceries"),
+    ("TIM HORTONS", "Coffee"),
+    ("LANDLORD", "Rent"),
+    ("PAYROLL 2024", "Income"),
+    ("ALPHA STORE", None),
+    ("SUMMER sale item", "Groceries"),
+]
+ROWS_PER_MONTH = {"2024-01": 30, "2024-02": 60, "2024-03": 5}
+
+BUDGET = """\
+name: Student
+start_date: 2024-01-01
+end_date: 2024-02-01
+last_edited: 2024-01-01 00:00:00
+total_budgeted: 2000
+items:
+- categories: [Groceries, Coffee]
+  budgeted_amount: 500
+- categories: [Rent]
+  budgeted_amount: 1500
+"""
+
+
+@pytest.fixture(scope="module")
+def plot(tmp_path_factory):
+    # plot.py loads its data on import, relative to the working directory
+    root = tmp_path_factory.mktemp("budget")
+    data_path = root / "src" / "budget" / "data"
+    budget_path = root / "src" / "budget" / "budgets"
+    data_path.mkdir(parents=True)
+    budget_path.mkdir()
+
+    rows = []
+    for month, count in ROWS_PER_MONTH.items():
+        for i in range(count):
+            description, category = DESCRIPTIONS[i % len(DESCRIPTIONS)]
+            income = category == "Income"
+            rows.append(
+                {
+                    "date": f"{month}-{i % 28 + 1:02d}",
+                    "description": description,
+                    "out": None if income else 10.0 + i,
+                    "in": 1000.0 if income else None,
+                    "type": "debit",
+                    "category": category,
+                }
+            )
+    pd.DataFrame(rows).to_csv(data_path / "transactions.csv", index=False)
+    (budget_path / "Student.yaml").write_text(BUDGET)
+
+    sys.modules.pop("budget.plot", None)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(root)
+        module = importlib.import_module("budget.plot")
+    yield module
+    sys.modules.pop("budget.plot", None)
+
+
+@pytest.mark.parametrize(
+    "selection", [None, [], "Coffee", ["Coffee"], ["Rent", "Coffee"], ["All"]]
+)
+def test_update_chart_accepts_category_selection(plot, selection):
+    figures = plot.update_chart("2024-02", 3, selection)
+
+    assert len(figures) == 5
+
+
+def test_update_chart_normalizes_category_selection(plot):
+    assert plot.update_chart("2024-02", 3, []) is plot.update_chart("2024-02", 3, None)
+    assert plot.update_chart("2024-02", 3, "Coffee") is plot.update_chart(
+        "2024-02", 3, ["Coffee"]
+    )
+    assert plot.update_chart("2024-02", 3, ["Rent", "Coffee"]) is plot.update_chart(
+        "2024-02", 3, ["Coffee", "Rent"]
+    )
+
+
+def test_category_line_chart_orders_categories_alphabetically(plot):
+    line_figure = plot.update_chart("2024-02", 3, ["Groceries", "Coffee"])[1]
+
+    assert [trace.name for trace in line_figure.data] == [
+        "Coffee In",
+        "Coffee Out",
+        "Groceries In",
+        "Groceries Out",
+    ]
+
+
+@pytest.mark.parametrize(
+    "filter_part, expected",
+    [
+        ("{money_out} > 100", ("money_out", "gt", 100.0)),
+        ("{money_out} >= 12.5", ("money_out", "ge", 12.5)),
+        ("{category} = Coffee", ("category", "eq", "Coffee")),
+        (
+            '{description} contains "sale item"',
+            ("description", "contains", "sale item"),
+        ),
+        ("{description} contains 2024", ("description", "contains", "2024")),
+        ("{date} datestartswith 2024-02", ("date", "datestartswith", "2024-02")),
+        ("{description} = 'it\\'s'", ("description", "eq", "it's")),
+        ("money_out > 100", (None, None, None)),
+    ],
+)
+def test_split_filter_part(plot, filter_part, expected):
+    assert plot.split_filter_part(filter_part) == expected
+
+
+def test_filter_rows(plot):
+    df = pd.DataFrame(
+        {
+            "description": pd.Categorical(
+                ["PAYROLL 2024", "SUMMER sale item", "TIM HORTONS"]
+            ),
+            "money_out": [None, 20.0, 2.5],
+        }
+    )
+
+    def matching(filter_part):
+        column, op, value = plot.split_filter_part(filter_part)
+        return df["description"][plot.filter_rows(df, column, op, value)].tolist()
+
+    assert matching("{description} contains 2024") == ["PAYROLL 2024"]
+    assert matching('{description} contains "sale item"') == ["SUMMER sale item"]
+    assert matching("{money_out} < 10") == ["TIM HORTONS"]
+    assert matching("{description} < 10") == []
+
+
+def test_filter_rows_never_matches_missing_cells(plot):
+    df = pd.DataFrame(
+        {
+            "category": pd.Categorical(["Groceries", None, "Coffee"]),
+            "money_in": [None, 1000.0, None],
+            "date": ["2024-02-01", "2024-02-02", "2024-02-03"],
+        }
+    )
+
+    def matching(filter_part):
+        column, op, value = plot.split_filter_part(filter_part)
+        return df.index[plot.filter_rows(df, column, op, value)].tolist()
+
+    assert matching("{category} contains an") == []
+    assert matching("{category} contains o") == [0, 2]
+    assert matching("{money_in} contains na") == []
+    assert matching("{money_in} contains 1000") == [1]
+    assert matching("{category} datestartswith n") == []
+    assert matching("{category} < Z") == [0, 2]
+    assert matching("{money_in} > 0") == [1]
+
+
+def test_update_table_sorts_text_alphabetically(plot, monkeypatch):
+    # Categories in first-appearance order, as read from the Parquet file
+    descriptions = ["SOBEYS 123", "PAYROLL 2024", "TIM HORTONS", "ALPHA STORE"]
+    month = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2024-02-01"] * 4),
+            "description": pd.Categorical(descriptions, categories=descriptions),
+            "category": pd.Categorical(["Groceries", "Income", "Coffee", None]),
+            "money_in": [None, 1000.0, None, None],
+            "money_out": [12.0, None, 2.5, 40.0],
+        }
+    )
+    monkeypatch.setitem(plot.transactions_by_month, "2024-02", month)
+
+    records, _, _ = plot.update_table(
+        "2024-02", 0, 25, [{"column_id": "description", "direction": "asc"}], ""
+    )
+
+    assert [row["description"] for row in records] == sorted(descriptions)
+
+
+def test_update_table_pages(plot):
+    pages = [plot.update_table("2024-02", page, 25, [], "") for page in range(3)]
+
+    assert [len(records) for records, _, _ in pages] == [25, 25, 10]
+    assert {(page_count, page) for _, page_count, page in pages} == {
+        (3, 0),
+        (3, 1),
+        (3, 2),
+    }
+
+
+def test_update_table_clamps_page_to_last_page(plot):
+    # Viewing page 3 of February, then switching to March (one page)
+    records, page_count, page_current = plot.update_table("2024-03", 2, 25, [], "")
+
+    assert (len(records), page_count, page_current) == (5, 1, 0)
+
+
+def test_update_table_filters_and_sorts_before_paging(plot):
+    records, page_count, page_current = plot.update_table(
+        "2024-02",
+        2,
+        25,
+        [{"column_id": "money_out", "direction": "desc"}],
+        "{category} = Coffee && {money_out} > 20",
+    )
+
+    assert (page_count, page_current) == (1, 0)
+    assert {row["category"] for row in records} == {"Coffee"}
+    money_out = [row["money_out"] for row in records]
+    assert money_out == sorted(money_out, reverse=True)
+    assert min(money_out) > 20